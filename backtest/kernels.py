@@ -0,0 +1,121 @@
+"""
+Numeric kernels for the offline backtest.
+
+Compiled with Numba when it is installed; otherwise the same functions run
+as plain Python over NumPy arrays.
+"""
+
+import numpy as np
+
+try:  # optional: JIT-compile the per-code sweep
+    from numba import njit
+except ImportError:  # pragma: no cover
+    def njit(*args, **kwargs):
+        if args and callable(args[0]):
+            return args[0]
+        return lambda f: f
+
+
+@njit(cache=True)
+def _fmax(a: float, b: float) -> float:
+    # NaN-skipping max (np.fmax / pandas max(axis=1))
+    if a != a:
+        return b
+    if b != b:
+        return a
+    return a if a >= b else b
+
+
+@njit(cache=True)
+def sweep(o, h, l, c, v, anchor_idx, n, period, dev_mult, direction):
+    """Scan bars [0, n) once and return the bars where an entry triggers.
+
+    AVWAP is accumulated from anchor_idx, skipping bars whose close or
+    volume is NaN; ATR is the mean true range of the last `period` bars, NaN while
+    a NaN true range is inside that window (pandas rolling mean).
+    direction: +1 short (fade a rise above AVWAP), -1 long.
+    Returns (bar_idx, avwap, atr) for the triggering bars.
+    """
+    out_idx = np.empty(n, dtype=np.int64)
+    out_avwap = np.empty(n, dtype=np.float64)
+    out_atr = np.empty(n, dtype=np.float64)
+    tr = np.zeros(n, dtype=np.float64)
+    k = 0
+    wv = 0.0
+    wsum = 0.0
+    for i in range(n):
+        if i >= anchor_idx:
+            pv = c[i] * v[i]
+            if pv == pv:  # a bar with a blank close or volume adds nothing
+                wv += pv
+                wsum += v[i]
+        if i < 1:
+            continue
+        pc = c[i - 1]
+        tr[i] = _fmax(_fmax(h[i] - l[i], abs(h[i] - pc)), abs(l[i] - pc))
+        if wsum == 0 or i < period:
+            continue
+        # Re-sum the window rather than keep a running total, so a NaN true
+        # range only blanks the `period` bars that contain it
+        tr_sum = 0.0
+        for j in range(i - period + 1, i + 1):
+            tr_sum += tr[j]
+        avwap = wv / wsum
+        atr = tr_sum / period
+        if not (np.isfinite(avwap) and np.isfinite(atr)):
+            continue
+        cp = c[i]
+        if not abs(cp - avwap) >= dev_mult * atr:
+            continue
+        prev_open = o[i - 1]
+        prev_close = c[i - 1]
+        if direction > 0:
+            hit = cp > avwap and prev_close > prev_open and cp < prev_open
+        else:
+            hit = cp < avwap and prev_close < prev_open and cp > prev_open
+        if hit:
+            out_idx[k] = i
+            out_avwap[k] = avwap
+            out_atr[k] = atr
+            k += 1
+    return out_idx[:k], out_avwap[:k], out_atr[:k]
+
+
+@njit(cache=True, nogil=True)
+def screen_aoi(aoi, starts, ends, threshold, stability):
+    """Screen AOI samples grouped contiguously per code in one pass.
+
+    Group g spans aoi[starts[g]:ends[g]] in time order. Returns
+    (sel, final, std): indices of groups whose last AOI satisfies
+    |AOI| >= threshold with population std <= stability (at least three
+    samples, none NaN), plus the per-group last AOI and std. The std
+    agrees with np.std to within rounding, not bit for bit.
+    """
+    n = len(starts)
+    sel = np.empty(n, dtype=np.int64)
+    final = np.full(n, np.nan)
+    std = np.full(n, np.nan)
+    k = 0
+    for g in range(n):
+        s = starts[g]
+        e = ends[g]
+        m = e - s
+        if m == 0:
+            continue
+        final[g] = aoi[e - 1]
+        # two passes like np.std, but summed sequentially where np.std sums
+        # pairwise, so the result matches it only to within rounding (last
+        # ulp); a NaN sample leaves std NaN
+        total = 0.0
+        for i in range(s, e):
+            total += aoi[i]
+        mean = total / m
+        ss = 0.0
+        for i in range(s, e):
+            d = aoi[i] - mean
+            ss += d * d
+        std[g] = np.sqrt(ss / m)
+        if m >= 3 and abs(final[g]) >= threshold and std[g] <= stability:
+            sel[k] = g
+            k += 1
+    return sel[:k], final, std
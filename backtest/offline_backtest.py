@@ -22,89 +22,203 @@ Usage:
 import argparse
 import json
 import logging
+import math
+import os
+import tempfile
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from dataclasses import asdict, dataclass
+from itertools import repeat
+from multiprocessing.shared_memory import SharedMemory
+from operator import attrgetter
 from pathlib import Path
 from datetime import datetime, time
-from typing import Dict, List
+from typing import Callable, Dict, Iterable, List, Tuple
 
 import pandas as pd
 import numpy as np
 
+try:  # optional: multithreaded CSV parsing and a Parquet cache of minute bars
+    import pyarrow as pa
+    import pyarrow.csv as pacsv
+    import pyarrow.parquet as pq
+except ImportError:  # pragma: no cover
+    pa = None
+
+try:  # optional: faster JSON serialization of the results
+    import orjson
+except ImportError:  # pragma: no cover
+    orjson = None
+
 import sys
 sys.path.append(str(Path(__file__).resolve().parents[1]))
 
 import config
-def calc_avwap(df: pd.DataFrame, anchor_time: pd.Timestamp) -> float | None:
-    d = df[df["datetime"] >= anchor_time].copy()
-    if d.empty:
-        return None
-    if d["volume"].sum() == 0:
-        return None
-    return float((d["close"] * d["volume"]).sum() / d["volume"].sum())
-
-
-def calc_atr(df: pd.DataFrame, period: int = 5) -> float | None:
-    if len(df) < period + 1:
-        return None
-    d = df.copy()
-    d["prev_close"] = d["close"].shift(1)
-    tr1 = d["high"] - d["low"]
-    tr2 = (d["high"] - d["prev_close"]).abs()
-    tr3 = (d["low"] - d["prev_close"]).abs()
-    d["tr"] = pd.concat([tr1, tr2, tr3], axis=1).max(axis=1)
-    atr = d["tr"].rolling(window=period).mean().iloc[-1]
-    return float(atr) if pd.notna(atr) else None
-
-
-def check_trigger(df: pd.DataFrame, direction: str, avwap: float) -> tuple[str, float] | None:
-    if len(df) < 2:
-        return None
-    cur = df.iloc[-1]
-    prev = df.iloc[-2]
-    cp = float(cur["close"])
-    if direction == "short":
-        if cp > avwap and prev["close"] > prev["open"] and cp < float(prev["open"]):
-            return ("逆張りショート", float(prev["open"]))
-    else:
-        if cp < avwap and prev["close"] < prev["open"] and cp > float(prev["open"]):
-            return ("逆張りロング", float(prev["open"]))
-    return None
+from backtest.kernels import screen_aoi, sweep
 
 
-def build_monitoring_list(aoi_csv: Path, trading_date: str) -> List[Dict]:
-    df = pd.read_csv(aoi_csv)
+@dataclass(slots=True)
+class PriceSoA:
+    """Minute bars of one code as column arrays (sorted by datetime)."""
+
+    datetime: np.ndarray  # datetime64[ns]
+    open: np.ndarray  # float64
+    high: np.ndarray
+    low: np.ndarray
+    close: np.ndarray
+    volume: np.ndarray  # int32/int64 when whole shares, else float64
+
+    @classmethod
+    def from_frame(cls, df: pd.DataFrame) -> "PriceSoA":
+        return cls(
+            datetime=df["datetime"].to_numpy(dtype="datetime64[ns]"),
+            open=df["open"].to_numpy(dtype=np.float64),
+            high=df["high"].to_numpy(dtype=np.float64),
+            low=df["low"].to_numpy(dtype=np.float64),
+            close=df["close"].to_numpy(dtype=np.float64),
+            # integer volumes keep their dtype; the kernel accumulates in float64
+            volume=df["volume"].to_numpy(dtype=None if pd.api.types.is_integer_dtype(df["volume"]) else np.float64),
+        )
+
+    def __len__(self) -> int:
+        return len(self.close)
+
+
+@dataclass(slots=True, frozen=True)
+class Signal:
+    """Entry signal emitted by the simulation (field order = JSON key order)."""
+
+    code: str
+    timestamp: str
+    signal_type: str
+    direction: str
+    current_price: float
+    avwap: float
+    atr: float
+    entry_trigger_price: float
+    target_price: float
+    stop_loss_price: float
+    price_deviation: float
+    setup_threshold: float
+
+
+def _read_csv(p: Path, column_types: Dict | None = None) -> pd.DataFrame:
+    """Read a CSV with pyarrow's multithreaded parser when available, else pandas."""
+    if pa is None:
+        return pd.read_csv(p)
+    convert = pacsv.ConvertOptions(column_types=column_types or {})
+    return pacsv.read_csv(p, convert_options=convert).to_pandas()
+
+
+def _read_cached(p: Path, parse: Callable[[Path], pd.DataFrame]) -> pd.DataFrame:
+    """parse(p), reusing a Parquet copy next to the CSV while it is up to date."""
+    if pa is None:
+        return parse(p)
+    cache = p.with_suffix(".parquet")
+    if cache.exists() and cache.stat().st_mtime_ns >= p.stat().st_mtime_ns:
+        try:
+            return pq.read_table(cache).to_pandas()
+        except (OSError, pa.ArrowException) as e:
+            # Truncated/corrupt cache: fall back to the CSV and rewrite it below
+            logging.warning(f"Parquetキャッシュを読み込めません {cache}: {e}")
+    df = parse(p)
+    # Write a temp file in the same directory and rename it over the cache, so an
+    # interrupted or concurrent run never leaves a partial file under the real name
+    tmp = None
+    try:
+        fd, tmp = tempfile.mkstemp(dir=cache.parent, prefix=f"{cache.name}.", suffix=".tmp")
+        os.close(fd)
+        pq.write_table(pa.Table.from_pandas(df, preserve_index=False), tmp, compression="zstd")
+        os.replace(tmp, cache)
+    except (OSError, pa.ArrowException) as e:
+        logging.warning(f"Parquetキャッシュを書き込めません {cache}: {e}")
+        if tmp is not None:
+            Path(tmp).unlink(missing_ok=True)
+    return df
+
+
+def _read_aoi_file(p: Path) -> pd.DataFrame:
+    """Parse the AOI samples CSV (all dates)."""
+    df = _read_csv(p, {"code": pa.string(), "aoi": pa.float64()} if pa is not None else None)
     # Normalize
     if "timestamp" in df.columns:
-        df["timestamp"] = pd.to_datetime(df["timestamp"])  # JST assumed
+        df["timestamp"] = pd.to_datetime(df["timestamp"], format="ISO8601")  # JST assumed
     else:
         raise ValueError("AOI CSV must contain 'timestamp' column")
     if "code" not in df.columns or "aoi" not in df.columns:
         raise ValueError("AOI CSV must contain 'code' and 'aoi' columns")
+    return df
+
+
+def build_monitoring_list(aoi_csv: Path, trading_date: str) -> List[Dict]:
+    df = _read_cached(aoi_csv, _read_aoi_file)
 
     # Filter by date and time window 08:55:00–08:59:50
     d0 = pd.to_datetime(trading_date)
     start_dt = d0.replace(hour=8, minute=55, second=0)
     end_dt = d0.replace(hour=8, minute=59, second=50)
-    df = df[(df["timestamp"] >= start_dt) & (df["timestamp"] <= end_dt)].copy()
-
-    monitoring: List[Dict] = []
-    for code, g in df.groupby("code"):
-        aoi_values = g.sort_values("timestamp")["aoi"].astype(float).tolist()
-        if len(aoi_values) < 3:
-            continue
-        final_aoi = aoi_values[-1]
-        aoi_std = float(np.std(aoi_values))
-        if abs(final_aoi) >= config.AOI_THRESHOLD and aoi_std <= config.AOI_STABILITY_THRESHOLD:
-            direction = "short" if final_aoi > 0 else "long"
-            monitoring.append({
-                "code": str(code),
-                "aoi": float(final_aoi),
-                "aoi_std": float(aoi_std),
-                "direction": direction,
-                "aoi_history": aoi_values,
-            })
-
-    monitoring.sort(key=lambda x: abs(x["aoi"]), reverse=True)
-    return monitoring
+    # Boolean indexing already returns a new frame and df is only read below
+    df = df.loc[(df["timestamp"] >= start_dt) & (df["timestamp"] <= end_dt)]
+
+    if df.empty:
+        return []
+
+    # Rows contiguous per code (codes ascending, then time) for one kernel pass
+    ids, codes = pd.factorize(df["code"], sort=True)
+    order = np.lexsort((df["timestamp"].to_numpy(), ids))
+    order = order[ids[order] >= 0]
+    aoi = df["aoi"].to_numpy(dtype=np.float64)[order]
+    counts = np.bincount(ids[order], minlength=len(codes))
+    ends = np.cumsum(counts)
+    starts = ends - counts
+    sel, final, std = screen_aoi(aoi, starts, ends, float(config.AOI_THRESHOLD), float(config.AOI_STABILITY_THRESHOLD))
+    directions = np.where(final > 0, "short", "long")
+
+    # Strongest |AOI| first; the stable sort keeps code order among ties
+    sel = sel[np.argsort(-np.abs(final[sel]), kind="stable")]
+    return [
+        {
+            "code": str(codes[i]),
+            "aoi": float(final[i]),
+            "aoi_std": float(std[i]),
+            "direction": str(directions[i]),
+            "aoi_history": aoi[starts[i]:ends[i]].tolist(),
+        }
+        for i in sel
+    ]
+
+
+# Minute CSV schema: required lower-case OHLCV columns and the capitalized alternative
+_OHLCV = ("open", "high", "low", "close", "volume")
+_OHLCV_SET = frozenset(_OHLCV)
+_CAPITALIZED = {c.capitalize(): c for c in _OHLCV}
+
+
+def _read_minute_file(p: Path) -> pd.DataFrame:
+    """Parse one minute CSV into normalized columns, sorted by datetime (all dates)."""
+    df = _read_csv(p)
+    cols = frozenset(df.columns)
+    # Normalize columns
+    if "datetime" in cols:
+        df["datetime"] = pd.to_datetime(df["datetime"], format="ISO8601")  # JST assumed
+    elif "DateTime" in cols:
+        df["datetime"] = pd.to_datetime(df["DateTime"], format="ISO8601")  # copy
+    else:
+        raise ValueError(f"Minute CSV {p} must contain 'datetime' or 'DateTime'")
+    if not _OHLCV_SET <= cols:
+        # One rename instead of a column copy per capitalized name
+        df = df.rename(columns={k: v for k, v in _CAPITALIZED.items() if v not in cols and k in cols})
+        if not _OHLCV_SET <= frozenset(df.columns):
+            raise ValueError(f"Minute CSV {p} missing columns {list(_OHLCV)}")
+    # sort_values returns a new frame, so the column subset needs no .copy()
+    # Stable, so duplicate minutes keep file order
+    df = df[["datetime", *_OHLCV]].sort_values("datetime", kind="stable", ignore_index=True)
+    # Whole-share volumes are stored as int32 when they fit (one kernel specialization);
+    # prices stay float64 for the JSON output
+    vol = pd.to_numeric(df["volume"], downcast="integer")
+    if pd.api.types.is_integer_dtype(vol) and vol.dtype.itemsize <= 4:
+        df["volume"] = vol.astype(np.int32)
+    return df
 
 
 def load_minute_csv(minute_dir: Path, code: str, trading_date: str) -> pd.DataFrame:
@@ -116,97 +230,218 @@ def load_minute_csv(minute_dir: Path, code: str, trading_date: str) -> pd.DataFr
     ]
     for p in candidates:
         if p.exists():
-            df = pd.read_csv(p)
-            # Normalize columns
-            if "datetime" in df.columns:
-                df["datetime"] = pd.to_datetime(df["datetime"])  # JST assumed
-            elif "DateTime" in df.columns:
-                df["datetime"] = pd.to_datetime(df["DateTime"])  # copy
-            else:
-                raise ValueError(f"Minute CSV {p} must contain 'datetime' or 'DateTime'")
-            req = ["open", "high", "low", "close", "volume"]
-            mapping = {"Open": "open", "High": "high", "Low": "low", "Close": "close", "Volume": "volume"}
-            for k, v in mapping.items():
-                if v not in df.columns and k in df.columns:
-                    df[v] = df[k]
-            if not all(c in df.columns for c in req):
-                raise ValueError(f"Minute CSV {p} missing columns {req}")
-            df = df[ ["datetime", "open", "high", "low", "close", "volume"] ].copy()
-            df = df.sort_values("datetime").reset_index(drop=True)
-            # Filter target date rows only
-            date_only = pd.to_datetime(trading_date).date()
-            df = df[df["datetime"].dt.date == date_only]
-            return df
+            df = _read_cached(p, _read_minute_file)
+            # Filter target date rows only (sorted, so a binary search bounds the day)
+            day = pd.to_datetime(trading_date).normalize()
+            lo, hi = df["datetime"].searchsorted([day, day + pd.Timedelta(days=1)])
+            return df.iloc[lo:hi]
     raise FileNotFoundError(f"Minute CSV for {code} not found in {minute_dir}")
 
 
-def run_offline_backtest(aoi_csv: Path, minute_dir: Path, trading_date: str, output_json: Path) -> Dict:
+def simulate_code(code: str, direction: str, p: PriceSoA, anchor_time: pd.Timestamp, ticks: np.ndarray) -> List[Signal]:
+    """Evaluate entry signals for one code at each tick in a single forward sweep.
+
+    kernels.sweep keeps AVWAP (from anchor_time) and ATR as running sums and
+    reports the bars where the entry conditions hold; each tick then uses the
+    last bar at or before it. ticks is a sorted datetime64[ns] array.
+    """
+    period = config.ATR_PERIOD
+    dev_mult = config.AVWAP_DEVIATION_MULTIPLIER
+    anchor_idx = int(np.searchsorted(p.datetime, np.datetime64(anchor_time, "ns"), side="left"))
+    # Bar index in effect at each tick (-1: no bar yet)
+    tick_idx = np.searchsorted(p.datetime, ticks, side="right") - 1
+    if len(tick_idx) == 0 or tick_idx[-1] < 1:
+        return []
+
+    n = int(tick_idx[-1]) + 1
+    bar_idx, bar_avwap, bar_atr = sweep(
+        p.open, p.high, p.low, p.close, p.volume,
+        anchor_idx, n, period, dev_mult, 1 if direction == "short" else -1,
+    )
+    # slot[i]: position of bar i in the sweep output, -1 if it did not trigger
+    slot = np.full(n, -1, dtype=np.int64)
+    slot[bar_idx] = np.arange(len(bar_idx))
+    # Ticks with fewer than 2 bars are skipped
+    has_prev = tick_idx >= 1
+    idx = tick_idx[has_prev]
+    tick_times = ticks[has_prev]
+    hit = slot[idx]
+
+    stype = "逆張りショート" if direction == "short" else "逆張りロング"
+    signals: List[Signal] = []
+    for j in np.nonzero(hit >= 0)[0]:
+        i = idx[j]
+        avwap = float(bar_avwap[hit[j]])
+        atr = float(bar_atr[hit[j]])
+        cp = float(p.close[i])
+        signals.append(Signal(
+            code=code,
+            timestamp=pd.Timestamp(tick_times[j]).isoformat(),
+            signal_type=stype,
+            direction=direction,
+            current_price=cp,
+            avwap=avwap,
+            atr=atr,
+            entry_trigger_price=float(p.open[i - 1]),
+            target_price=avwap,
+            stop_loss_price=float(p.high[i] + config.STOP_LOSS_ATR_MULTIPLIER * atr) if direction == "short" else float(p.low[i] - config.STOP_LOSS_ATR_MULTIPLIER * atr),
+            price_deviation=abs(cp - avwap),
+            setup_threshold=dev_mult * atr,
+        ))
+    return signals
+
+
+def _price_views(buf, n: int) -> Tuple[np.ndarray, np.ndarray]:
+    """Shared block layout: int64 datetimes [n], then float64 OHLCV rows [5, n]."""
+    dt = np.ndarray((n,), dtype=np.int64, buffer=buf)
+    cols = np.ndarray((5, n), dtype=np.float64, buffer=buf, offset=dt.nbytes)
+    return dt, cols
+
+
+def _share_prices(soas: List[PriceSoA]) -> Tuple[SharedMemory, List[Tuple[int, int]]]:
+    """Pack every code's bars into one shared-memory block; returns it and each code's [lo, hi)."""
+    n = sum(len(p) for p in soas)
+    shm = SharedMemory(create=True, size=max(1, 6 * 8 * n))
+    dt, cols = _price_views(shm.buf, n)
+    bounds = []
+    lo = 0
+    for p in soas:
+        hi = lo + len(p)
+        dt[lo:hi] = p.datetime.view(np.int64)
+        for row, a in enumerate((p.open, p.high, p.low, p.close, p.volume)):
+            cols[row, lo:hi] = a
+        bounds.append((lo, hi))
+        lo = hi
+    return shm, bounds
+
+
+# Worker-side attachment of the shared price block (set by _attach_prices)
+_shared_prices: Dict = {}
+
+
+def _attach_prices(name: str, n: int) -> None:
+    shm = SharedMemory(name=name)
+    _shared_prices["shm"] = shm  # keep the mapping alive for the worker's lifetime
+    _shared_prices["dt"], _shared_prices["cols"] = _price_views(shm.buf, n)
+
+
+def _simulate_shared(code: str, direction: str, bounds: Tuple[int, int], anchor_time: pd.Timestamp, ticks: np.ndarray) -> List[Signal]:
+    """simulate_code over zero-copy views into the shared price block."""
+    lo, hi = bounds
+    cols = _shared_prices["cols"]
+    p = PriceSoA(
+        _shared_prices["dt"][lo:hi].view("datetime64[ns]"),
+        cols[0, lo:hi], cols[1, lo:hi], cols[2, lo:hi], cols[3, lo:hi], cols[4, lo:hi],
+    )
+    return simulate_code(code, direction, p, anchor_time, ticks)
+
+
+def _json_safe(obj):
+    """Replace NaN/inf floats with None (null); orjson and json would disagree on them."""
+    if isinstance(obj, float):
+        return obj if math.isfinite(obj) else None
+    if isinstance(obj, dict):
+        return {k: _json_safe(v) for k, v in obj.items()}
+    if isinstance(obj, list):
+        return [_json_safe(v) for v in obj]
+    return obj
+
+
+def _write_json(path: Path, obj: Dict) -> None:
+    """Write obj as indented UTF-8 JSON (orjson when available); non-finite floats become null."""
+    obj = _json_safe(obj)
+    if orjson is not None:
+        path.write_bytes(orjson.dumps(obj, option=orjson.OPT_INDENT_2))
+        return
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(obj, f, ensure_ascii=False, indent=2, allow_nan=False)
+
+
+def _write_jsonl(path: Path, rows: Iterable[Dict]) -> int:
+    """Write rows one compact JSON object per line; returns the row count."""
+    n = 0
+    with open(path, "wb") as f:
+        for row in rows:
+            row = _json_safe(row)
+            if orjson is not None:
+                f.write(orjson.dumps(row))
+            else:
+                f.write(json.dumps(row, ensure_ascii=False, separators=(",", ":"), allow_nan=False).encode("utf-8"))
+            f.write(b"\n")
+            n += 1
+    return n
+
+
+def run_offline_backtest(aoi_csv: Path, minute_dir: Path, trading_date: str, output_json: Path, workers: int = 1, jsonl: bool = False) -> Dict:
     logging.info("AOIから監視対象銘柄を選定中...")
     monitoring_list = build_monitoring_list(aoi_csv, trading_date)
     logging.info(f"監視対象銘柄: {len(monitoring_list)} 件")
 
     # Load data
     d0 = pd.to_datetime(trading_date)
-    price_data: Dict[str, pd.DataFrame] = {}
-    for stock in monitoring_list:
-        code = stock["code"]
-        price_data[code] = load_minute_csv(minute_dir, code, trading_date)
+    # File reads and CSV/Parquet parsing release the GIL, so threads overlap them
+    codes = [stock["code"] for stock in monitoring_list]
+    with ThreadPoolExecutor(max_workers=max(1, min(32, len(codes)))) as ex:
+        frames = ex.map(lambda code: load_minute_csv(minute_dir, code, trading_date), codes)
+        price_data: Dict[str, PriceSoA] = {
+            code: PriceSoA.from_frame(df) for code, df in zip(codes, frames)
+        }
 
     # Simulate minute-by-minute from 09:02 to 09:15
+    anchor_t = d0.replace(hour=9, minute=0, second=0)
     start_t = d0.replace(hour=9, minute=2, second=0)
     end_t = d0.replace(hour=9, minute=15, second=0)
+    # Tick times as one datetime64[ns] array shared by every code's lookup
+    ticks = pd.date_range(start_t, end_t, freq="1min").to_numpy(dtype="datetime64[ns]")
+
+    # Codes are independent; with workers > 1 they are simulated in separate processes
+    directions = [stock["direction"] for stock in monitoring_list]
+    soas = [price_data[code] for code in codes]
+    if workers > 1 and len(codes) > 1:
+        # Workers map the bars from shared memory instead of unpickling a copy per code
+        shm, bounds = _share_prices(soas)
+        try:
+            with ProcessPoolExecutor(
+                max_workers=min(workers, len(codes)),
+                initializer=_attach_prices,
+                initargs=(shm.name, sum(len(p) for p in soas)),
+            ) as ex:
+                per_code = list(ex.map(_simulate_shared, codes, directions, bounds, repeat(anchor_t), repeat(ticks)))
+        finally:
+            shm.close()
+            shm.unlink()
+    else:
+        per_code = list(map(simulate_code, codes, directions, soas, repeat(anchor_t), repeat(ticks)))
+    signals: List[Signal] = [s for code_signals in per_code for s in code_signals]
+    # Chronological order; stable sort keeps monitoring order within a minute
+    signals.sort(key=attrgetter("timestamp"))
 
-    signals: List[Dict] = []
-    current_t = start_t
-    while current_t <= end_t:
-        for stock in monitoring_list:
-            code = stock["code"]
-            direction = stock["direction"]
-            df_full = price_data[code]
-            # Use data up to current_t
-            df = df_full[df_full["datetime"] <= current_t].copy()
-            if len(df) < 2:
-                continue
-            avwap = calc_avwap(df, d0.replace(hour=9, minute=0, second=0))
-            atr = calc_atr(df, config.ATR_PERIOD)
-            if avwap is None or atr is None:
-                current_t = current_t + pd.Timedelta(minutes=1)
-                continue
-            cp = float(df["close"].iloc[-1])
-            if abs(cp - avwap) < config.AVWAP_DEVIATION_MULTIPLIER * atr:
-                current_t = current_t + pd.Timedelta(minutes=1)
-                continue
-            trig = check_trigger(df, direction, avwap)
-            if trig:
-                stype, entry = trig
-                signals.append({
-                    "code": code,
-                    "timestamp": current_t.isoformat(),
-                    "signal_type": stype,
-                    "direction": direction,
-                    "current_price": cp,
-                    "avwap": avwap,
-                    "atr": atr,
-                    "entry_trigger_price": entry,
-                    "target_price": avwap,
-                    "stop_loss_price": (df.iloc[-1]["high"] + config.STOP_LOSS_ATR_MULTIPLIER * atr) if direction == "short" else (df.iloc[-1]["low"] - config.STOP_LOSS_ATR_MULTIPLIER * atr),
-                    "price_deviation": abs(cp - avwap),
-                    "setup_threshold": config.AVWAP_DEVIATION_MULTIPLIER * atr,
-                })
-        current_t = current_t + pd.Timedelta(minutes=1)
-
-    # Restore full data (optional)
     # Persist results
-    out = {
-        "date": trading_date,
-        "monitoring_count": len(monitoring_list),
-        "signals": signals,
-    }
     output_json.parent.mkdir(parents=True, exist_ok=True)
-    with open(output_json, "w", encoding="utf-8") as f:
-        json.dump(out, f, ensure_ascii=False, indent=2)
+    if jsonl:
+        # Signals (already collected and sorted above) go one per line to a sidecar
+        # file; the JSON keeps only a summary. The ".signals" infix keeps the two
+        # paths distinct even when --output itself ends in .jsonl
+        signals_path = output_json.with_name(output_json.stem + ".signals.jsonl")
+        out = {
+            "date": trading_date,
+            "monitoring_count": len(monitoring_list),
+            "signals_count": _write_jsonl(signals_path, (asdict(s) for s in signals)),
+            "signals_file": signals_path.name,
+        }
+    else:
+        out = {
+            "date": trading_date,
+            "monitoring_count": len(monitoring_list),
+            "signals": [asdict(s) for s in signals],
+        }
+    _write_json(output_json, out)
 
-    logging.info(f"オフラインバックテスト完了: {len(signals)} 件のシグナルを {output_json} に保存")
+    by_direction = Counter(s.direction for s in signals)
+    logging.info(
+        f"オフラインバックテスト完了: {len(signals)} 件のシグナル"
+        f"（ロング {by_direction['long']} / ショート {by_direction['short']}）を {output_json} に保存"
+    )
     return out
 
 
@@ -217,13 +452,15 @@ def parse_args() -> argparse.Namespace:
     p.add_argument("--date", required=True, help="Trading date YYYY-MM-DD (JST)")
     p.add_argument("--output", required=True, help="Output JSON path")
     p.add_argument("--log", default="INFO", help="Log level (default: INFO)")
+    p.add_argument("--workers", type=int, default=1, help="Processes for the per-code simulation (default: 1)")
+    p.add_argument("--jsonl", action="store_true", help="Write signals one per line to <output stem>.signals.jsonl and only a summary to --output")
     return p.parse_args()
 
 
 def main() -> None:
     args = parse_args()
     logging.basicConfig(level=getattr(logging, args.log.upper(), logging.INFO), format='%(asctime)s %(levelname)s %(message)s')
-    run_offline_backtest(Path(args.aoi), Path(args.minute_dir), args.date, Path(args.output))
+    run_offline_backtest(Path(args.aoi), Path(args.minute_dir), args.date, Path(args.output), workers=args.workers, jsonl=args.jsonl)
 
 
 if __name__ == "__main__":
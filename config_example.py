@@ -24,6 +24,9 @@ PRE_MARKET_START_TIME = "08:55:00"
 # Data fetch interval (seconds)
 DATA_FETCH_INTERVAL = 10
 
+# Concurrent board requests per scan tick
+BOARD_FETCH_WORKERS = 8
+
 # Logging
 LOG_LEVEL = "INFO"
 LOG_FILE = "asagake.log"
@@ -5,9 +5,10 @@ Output: list of stock codes (console/text file).
 """
 
 import logging
+import queue
 import sys
-from datetime import datetime
-from typing import Tuple
+from logging.handlers import QueueHandler, QueueListener, RotatingFileHandler
+from typing import Dict, Optional
 from apscheduler.schedulers.blocking import BlockingScheduler
 from apscheduler.triggers.cron import CronTrigger
 
@@ -20,11 +21,23 @@ import config
 from modules.kabu_screener import KabuScreener
 
 
-def setup_logging() -> None:
-    """Initialize logging for console and file."""
+def setup_logging() -> Optional[QueueListener]:
+    """Initialize logging for console and file.
+
+    Records are queued and written by a background listener so callers never
+    block on console/disk IO. Returns the listener (stop it on exit), or None
+    if logging was already configured.
+    """
+    root_logger = logging.getLogger()
+    if root_logger.handlers:
+        # Already configured (e.g. called twice); avoid duplicate log lines
+        return None
+
     log_format = '%(asctime)s - %(name)s - %(levelname)s - %(message)s'
 
-    file_handler = logging.FileHandler(config.LOG_FILE, encoding='utf-8')
+    file_handler = RotatingFileHandler(
+        config.LOG_FILE, maxBytes=10_000_000, backupCount=3, encoding='utf-8'
+    )
     file_handler.setLevel(getattr(logging, config.LOG_LEVEL))
     file_handler.setFormatter(logging.Formatter(log_format))
 
@@ -32,10 +45,28 @@ def setup_logging() -> None:
     console_handler.setLevel(logging.INFO)
     console_handler.setFormatter(logging.Formatter(log_format))
 
-    root_logger = logging.getLogger()
+    log_queue: queue.Queue = queue.Queue(-1)
+    listener = QueueListener(log_queue, file_handler, console_handler, respect_handler_level=True)
+    listener.start()
+
+    # Filter on the calling thread too, so records no handler wants (e.g. urllib3
+    # DEBUG per request) are not formatted and queued only to be dropped
+    queue_handler = QueueHandler(log_queue)
+    queue_handler.setLevel(min(file_handler.level, console_handler.level))
+
     root_logger.setLevel(logging.DEBUG)
-    root_logger.addHandler(file_handler)
-    root_logger.addHandler(console_handler)
+    root_logger.addHandler(queue_handler)
+    return listener
+
+
+def _cron_fields(value: str) -> Dict[str, int]:
+    """Convert "HH:MM:SS" into CronTrigger hour/minute/second keyword arguments."""
+    h, m, s = value.split(":")
+    return {"hour": int(h), "minute": int(m), "second": int(s)}
+
+
+# Parsed once at import so a malformed time fails at startup
+PRE_MARKET_CRON = _cron_fields(config.PRE_MARKET_START_TIME)
 
 
 class AsagakeScreenerApp:
@@ -70,12 +101,6 @@ class AsagakeScreenerApp:
     def setup_scheduler(self) -> None:
         """Configure APScheduler jobs for JST schedule."""
         try:
-            def _hms(value: str) -> Tuple[int, int, int]:
-                h, m, s = value.split(":")
-                return int(h), int(m), int(s)
-
-            pm_h, pm_m, pm_s = _hms(config.PRE_MARKET_START_TIME)
-
             tz = ZoneInfo("Asia/Tokyo") if ZoneInfo else None
 
             # Screener (Mon–Fri)
@@ -83,10 +108,8 @@ class AsagakeScreenerApp:
                 func=self.run_pre_market_scan,
                 trigger=CronTrigger(
                     day_of_week='mon-fri',
-                    hour=pm_h,
-                    minute=pm_m,
-                    second=pm_s,
                     timezone=tz,
+                    **PRE_MARKET_CRON,
                 ),
                 id='screener',
                 name='kabu_preopen_screener',
@@ -148,7 +171,7 @@ class AsagakeScreenerApp:
 
 def main() -> None:
     """Main entry point."""
-    setup_logging()
+    listener = setup_logging()
     logger = logging.getLogger(__name__)
 
     try:
@@ -165,6 +188,10 @@ def main() -> None:
     except Exception as e:
         logger.error(f"メイン関数でエラー: {e}")
         sys.exit(1)
+    finally:
+        # Flush queued records before the process exits
+        if listener:
+            listener.stop()
 
 
 if __name__ == "__main__":
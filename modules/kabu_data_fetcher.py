@@ -10,14 +10,59 @@ auカブコム証券 kabuステーション® API データ取得
 from __future__ import annotations
 
 import logging
-from typing import Dict, Optional
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional
+import numpy as np
 import requests
+from requests.adapters import HTTPAdapter
 from datetime import datetime
 import config
 
+try:  # 任意: 高速なJSONデコード
+    import orjson
+    _loads = orjson.loads
+except ImportError:  # pragma: no cover
+    import json
+    _loads = json.loads
+
 logger = logging.getLogger(__name__)
 
 
+def _json(resp: requests.Response):
+    """応答本文をバイト列のままデコード（文字コード推定を省く）"""
+    return _loads(resp.content)
+
+
+def _best_price(price, depth):
+    """最良気配値（なければ板の先頭気配の Price）"""
+    if price:
+        return price
+    if isinstance(depth, list) and depth:
+        return depth[0].get("Price")
+    return None
+
+
+def _sum_depth(arr) -> int:
+    """板の各気配の数量を合計（数値化できない数量は無視）"""
+    if not isinstance(arr, list):
+        return 0
+    total = 0
+    for item in arr:
+        # item は dict で Qty or Volume を持つことが多い
+        qty = (
+            item.get("Qty")
+            or item.get("qty")
+            or item.get("Volume")
+            or item.get("volume")
+            or 0
+        )
+        try:
+            total += int(qty)
+        except Exception:
+            pass
+    return total
+
+
 class KabuDataFetcher:
     """kabuステーション API ラッパー"""
 
@@ -25,8 +70,16 @@ class KabuDataFetcher:
         self.base_url = config.KABU_API_BASE_URL.rstrip("/")
         self.apikey = config.KABU_API_KEY
         self.token: Optional[str] = None
+        # 旧い config.py には BOARD_FETCH_WORKERS が無いため既定値 8 を用いる
+        self.max_workers = max(1, int(getattr(config, "BOARD_FETCH_WORKERS", 8)))
+        # /board/{symbol}@{exchange} 形式が404で別形式なら成功した場合、以降は別形式のみ使う
+        self._board_at_unsupported = False
         self.session = requests.Session()
         self.session.headers.update({"Content-Type": "application/json"})
+        # 並列取得のワーカー数に合わせて接続プールを拡張（既定は10接続）
+        adapter = HTTPAdapter(pool_maxsize=self.max_workers)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
 
     def authenticate(self) -> bool:
         """POST /token でトークン取得（ローカルAPI）"""
@@ -34,12 +87,13 @@ class KabuDataFetcher:
             url = f"{self.base_url}/token"
             resp = self.session.post(url, json={"APIPassword": self.apikey}, timeout=3)
             resp.raise_for_status()
-            data = resp.json()
+            data = _json(resp)
             self.token = data.get("Token") or data.get("token")
             if not self.token:
                 logger.error("kabu API token が取得できませんでした")
                 return False
             self.session.headers.update({"X-API-KEY": self.apikey})
+            self._board_at_unsupported = False  # 接続先が変わり得るため判定をやり直す
             logger.info("kabu API 認証成功")
             return True
         except requests.exceptions.RequestException as e:
@@ -49,45 +103,34 @@ class KabuDataFetcher:
             logger.error(f"kabu API 認証予期しないエラー: {e}")
             return False
 
-    def get_board(self, code: str, exchange: int = None) -> Optional[Dict]:
+    def get_board(self, code: str, exchange: int = None, timestamp: Optional[str] = None) -> Optional[Dict]:
         """板情報を取得
 
         GET /board/{symbol}@{exchange}
         exchange: 1=東証, 3=名証, 5=福証, 6=札証 など（仕様に準拠）
+        timestamp: 記録時刻（省略時は取得時の現在時刻）
         """
         if exchange is None:
             exchange = config.KABU_EXCHANGE
         try:
             # 形式: /board/7203@1 （API仕様により /board/{symbol}?exchange=1 の場合もあり）
-            url1 = f"{self.base_url}/board/{code}@{exchange}"
-            resp = self.session.get(url1, timeout=3)
-            if resp.status_code == 404:
+            resp = None
+            if not self._board_at_unsupported:
+                url1 = f"{self.base_url}/board/{code}@{exchange}"
+                resp = self.session.get(url1, timeout=3)
+            if resp is None or resp.status_code == 404:
                 # 別形式
                 url2 = f"{self.base_url}/board/{code}"
-                resp = self.session.get(url2, params={"exchange": exchange}, timeout=3)
+                alt = self.session.get(url2, params={"exchange": exchange}, timeout=3)
+                if resp is not None and alt.ok and not self._board_at_unsupported:
+                    # 銘柄不在の404ではなく形式非対応と判断し、以降の往復を省く
+                    self._board_at_unsupported = True
+                    logger.info("板情報は /board/{symbol}?exchange= 形式で取得します")
+                resp = alt
             resp.raise_for_status()
-            b = resp.json()
+            b = _json(resp)
             # 正規化
             # kabu API の板は Best/Depth を含み得る。ここでは累計買い/売り数量を合計する。
-            def _sum_depth(arr):
-                if not isinstance(arr, list):
-                    return 0
-                total = 0
-                for item in arr:
-                    # item は dict で Qty or Volume を持つことが多い
-                    qty = (
-                        item.get("Qty")
-                        or item.get("qty")
-                        or item.get("Volume")
-                        or item.get("volume")
-                        or 0
-                    )
-                    try:
-                        total += int(qty)
-                    except Exception:
-                        pass
-                return total
-
             bid_depth = b.get("Buy1") or b.get("Bid") or b.get("buys") or []
             ask_depth = b.get("Sell1") or b.get("Ask") or b.get("sells") or []
             # 可能なら Depth 形式
@@ -99,12 +142,12 @@ class KabuDataFetcher:
             bid_volume = _sum_depth(bid_depth)
             ask_volume = _sum_depth(ask_depth)
 
-            best_bid = b.get("BidPrice") or (bid_depth[0].get("Price") if isinstance(bid_depth, list) and bid_depth else None)
-            best_ask = b.get("AskPrice") or (ask_depth[0].get("Price") if isinstance(ask_depth, list) and ask_depth else None)
+            best_bid = _best_price(b.get("BidPrice"), bid_depth)
+            best_ask = _best_price(b.get("AskPrice"), ask_depth)
 
             return {
                 "code": code,
-                "timestamp": datetime.now().isoformat(),
+                "timestamp": timestamp or datetime.now().isoformat(),
                 "bid_volume": bid_volume,
                 "ask_volume": ask_volume,
                 "bid_price": best_bid or 0,
@@ -117,6 +160,21 @@ class KabuDataFetcher:
             logger.warning(f"板情報取得予期せぬエラー {code}: {e}")
             return None
 
+    def get_boards(self, codes: List[str]) -> Dict[str, Optional[Dict]]:
+        """複数銘柄の板情報をスレッドプールで並列取得
+
+        通信待ちが支配的なため、get_board をワーカー数ぶん同時に発行する。
+        戻り値は codes の順序を保った {code: board or None}。
+        時刻はバッチ開始時に一度だけ取り、全銘柄の timestamp に用いる。
+        """
+        if not codes:
+            return {}
+        workers = min(self.max_workers, len(codes))
+        timestamp = datetime.now().isoformat()
+        with ThreadPoolExecutor(max_workers=workers) as ex:
+            boards = list(ex.map(lambda code: self.get_board(code, timestamp=timestamp), codes))
+        return dict(zip(codes, boards))
+
     @staticmethod
     def calculate_aoi(board: Dict) -> float:
         if not board:
@@ -128,3 +186,15 @@ class KabuDataFetcher:
             return 0.0
         return (b - a) / s
 
+    @staticmethod
+    def calculate_aoi_batch(boards: List[Optional[Dict]]) -> np.ndarray:
+        """複数の板のAOIを配列でまとめて計算（取得失敗の板は NaN）"""
+        n = len(boards)
+        bid = np.fromiter((b.get("bid_volume", 0) if b else 0 for b in boards), dtype=np.int64, count=n)
+        ask = np.fromiter((b.get("ask_volume", 0) if b else 0 for b in boards), dtype=np.int64, count=n)
+        s = bid + ask
+        # 板が空（s == 0）の銘柄は割り算せず 0.0 のまま
+        aoi = np.zeros(n, dtype=np.float64)
+        np.divide(bid - ask, s, out=aoi, where=s != 0)
+        aoi[np.fromiter((not b for b in boards), dtype=bool, count=n)] = np.nan
+        return aoi
@@ -10,8 +10,8 @@ from __future__ import annotations
 import csv
 import time
 import logging
-from typing import List, Dict
-from datetime import datetime
+from typing import List
+from datetime import datetime, timedelta
 import numpy as np
 
 import config
@@ -23,7 +23,9 @@ logger = logging.getLogger(__name__)
 class KabuScreener:
     def __init__(self) -> None:
         self.fetcher = KabuDataFetcher()
-        self.aoi_history: Dict[str, List[float]] = {}
+        # AOI記録: 行=銘柄（codes の順）、列=取得タイミング。未取得は NaN
+        self.codes: List[str] = []
+        self.aoi_matrix = np.empty((0, 0), dtype=np.float32)
 
     def load_prime_codes(self) -> List[str]:
         path = config.PRIME_LIST_CSV
@@ -52,47 +54,65 @@ class KabuScreener:
         if not self.fetcher.authenticate():
             logger.error("kabu API 認証失敗")
             return []
+        codes = list(dict.fromkeys(codes))  # 重複を除き順序を保持
 
         # 時間窓
-        start_time = datetime.now().replace(hour=8, minute=55, second=0, microsecond=0)
-        end_time = datetime.now().replace(hour=8, minute=59, second=50, microsecond=0)
-
         now = datetime.now()
+        start_time = now.replace(hour=8, minute=55, second=0, microsecond=0)
+        end_time = now.replace(hour=8, minute=59, second=50, microsecond=0)
+
         if now < start_time:
             wait = (start_time - now).total_seconds()
             logger.info(f"スキャン開始まで {wait:.0f} 秒待機")
             time.sleep(max(0, wait))
 
+        # start_time から DATA_FETCH_INTERVAL 刻みの境界で取得し、処理時間によるドリフトを防ぐ。
+        # 壁時計は start_time の位置合わせに一度だけ使い、以降は単調時計の期限で管理する
+        interval = timedelta(seconds=config.DATA_FETCH_INTERVAL)
+        interval_ns = int(config.DATA_FETCH_INTERVAL * 1_000_000_000)
+        n_ticks = max(0, (end_time - start_time) // interval + 1)
+        start_ns = time.monotonic_ns() + int((start_time - datetime.now()).total_seconds() * 1_000_000_000)
+        self.codes = codes
+        self.aoi_matrix = np.full((len(codes), n_ticks), np.nan, dtype=np.float32)
+        col = 0
         iteration = 0
-        while datetime.now() <= end_time:
+        while col < n_ticks:
+            tick_ns = start_ns + col * interval_ns
+            now_ns = time.monotonic_ns()
+            if now_ns < tick_ns:
+                time.sleep((tick_ns - now_ns) / 1_000_000_000)
+            elif now_ns - tick_ns >= interval_ns:
+                # 開始遅れ・処理超過で過ぎた境界は飛ばす
+                col += (now_ns - tick_ns) // interval_ns
+                continue
             iteration += 1
             logger.info(f"AOIスキャン {iteration} 回目")
-            for code in codes:
-                try:
-                    board = self.fetcher.get_board(code)
-                    if not board:
-                        continue
-                    aoi = KabuDataFetcher.calculate_aoi(board)
-                    self.aoi_history.setdefault(code, []).append(aoi)
-                except Exception as e:
-                    logger.warning(f"{code} AOI取得エラー: {e}")
-                    continue
-            time.sleep(config.DATA_FETCH_INTERVAL)
+            boards = self.fetcher.get_boards(codes)
+            self.aoi_matrix[:, col] = KabuDataFetcher.calculate_aoi_batch(list(boards.values()))
+            col += 1
 
         return self._select_codes()
 
     def _select_codes(self) -> List[str]:
-        selected: List[str] = []
-        for code, arr in self.aoi_history.items():
-            if len(arr) < 3:
-                continue
-            final_aoi = arr[-1]
-            std = float(np.std(arr))
-            if abs(final_aoi) >= config.AOI_THRESHOLD and std <= config.AOI_STABILITY_THRESHOLD:
-                selected.append(code)
-                logger.info(f"選定: {code} AOI={final_aoi:.3f} std={std:.3f}")
+        m = self.aoi_matrix
+        if m.size == 0:
+            return []
+        valid = ~np.isnan(m)
+        counts = valid.sum(axis=1)
+        # 各銘柄で最後に取得できたAOI
+        last_idx = m.shape[1] - 1 - np.argmax(valid[:, ::-1], axis=1)
+        final = m[np.arange(len(m)), last_idx].astype(np.float64)
+        std = np.full(len(m), np.nan)
+        enough = counts >= 3
+        std[enough] = np.nanstd(m[enough], axis=1, dtype=np.float64)
+        mask = enough & (np.abs(final) >= config.AOI_THRESHOLD) & (std <= config.AOI_STABILITY_THRESHOLD)
+        idx = np.nonzero(mask)[0]
         # AOI絶対値降順（最終値）
-        selected.sort(key=lambda c: abs(self.aoi_history.get(c, [0])[-1]), reverse=True)
+        idx = idx[np.argsort(-np.abs(final[idx]), kind="stable")]
+        selected: List[str] = []
+        for i in idx:
+            selected.append(self.codes[i])
+            logger.info(f"選定: {self.codes[i]} AOI={final[i]:.3f} std={std[i]:.3f}")
         return selected
 
     @staticmethod
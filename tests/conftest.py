@@ -0,0 +1,17 @@
+"""
+Test setup: make the repository root importable and, when no local
+config.py exists, use config_example.py as the config module.
+"""
+
+import importlib
+import sys
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+try:
+    import config  # noqa: F401
+except ImportError:
+    sys.modules["config"] = importlib.import_module("config_example")
@@ -0,0 +1,45 @@
+"""
+KabuScreener._select_codes: the NaN-aware matrix selection must pick the
+same codes in the same order as the original per-code list version.
+"""
+
+import numpy as np
+import pytest
+
+import config
+from modules.kabu_screener import KabuScreener
+
+
+def _ref_select(codes, matrix):
+    # Original logic: history holds only the AOI values actually fetched
+    history = {}
+    for code, row in zip(codes, matrix):
+        history[code] = [float(x) for x in row if not np.isnan(x)]
+    selected = []
+    for code, arr in history.items():
+        if len(arr) < 3:
+            continue
+        std = float(np.std(arr))
+        if abs(arr[-1]) >= config.AOI_THRESHOLD and std <= config.AOI_STABILITY_THRESHOLD:
+            selected.append(code)
+    selected.sort(key=lambda c: abs(history[c][-1]), reverse=True)
+    return selected
+
+
+@pytest.mark.parametrize("seed", range(200))
+def test_select_codes_matches_list_based_selection(seed):
+    rng = np.random.default_rng(seed)
+    n_codes, n_ticks = int(rng.integers(1, 60)), int(rng.integers(1, 31))
+    base = rng.uniform(-1.0, 1.0, size=(n_codes, 1))
+    noise = rng.uniform(0.0, 0.2, size=(n_codes, 1))
+    m = (base + rng.normal(size=(n_codes, n_ticks)) * noise).astype(np.float32)
+    m[rng.random(m.shape) < rng.uniform(0.0, 0.7)] = np.nan
+    # Same final |AOI| on several codes to exercise the sort order of ties
+    m[1::5, -1] = -m[:-1:5, -1][: len(m[1::5])]
+    codes = [str(1000 + i) for i in range(n_codes)]
+
+    screener = KabuScreener.__new__(KabuScreener)
+    screener.codes = codes
+    screener.aoi_matrix = m
+
+    assert screener._select_codes() == _ref_select(codes, m)
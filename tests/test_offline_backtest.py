@@ -0,0 +1,216 @@
+"""
+Parity of the sweep-based simulate_code with a per-minute pandas reference
+(the original calc_atr / check_trigger loop and calc_avwap), including bars
+with blank values.
+
+AVWAP deliberately differs from the original calc_avwap for a bar with a
+blank close but a volume: the original kept that volume in the denominator
+only, pulling AVWAP toward zero, whereas the backtest (and this reference)
+leaves such a bar out entirely. The README documents this.
+"""
+
+import json
+import math
+from dataclasses import asdict
+
+import numpy as np
+import pandas as pd
+import pytest
+
+import config
+from backtest.offline_backtest import (
+    PriceSoA,
+    build_monitoring_list,
+    load_minute_csv,
+    run_offline_backtest,
+    simulate_code,
+)
+
+DAY = pd.Timestamp("2025-09-02")
+ANCHOR = DAY.replace(hour=9, minute=0)
+TICKS = pd.date_range(DAY.replace(hour=9, minute=2), DAY.replace(hour=9, minute=15), freq="1min")
+
+
+def _ref_avwap(df: pd.DataFrame, anchor_time: pd.Timestamp) -> float | None:
+    d = df[df["datetime"] >= anchor_time]
+    # Bars with a blank close or volume are left out of both sums
+    d = d[(d["close"] * d["volume"]).notna()]
+    if d.empty or d["volume"].sum() == 0:
+        return None
+    return float((d["close"] * d["volume"]).sum() / d["volume"].sum())
+
+
+def _ref_atr(df: pd.DataFrame, period: int) -> float | None:
+    if len(df) < period + 1:
+        return None
+    prev_close = df["close"].shift(1)
+    tr = pd.concat([
+        df["high"] - df["low"],
+        (df["high"] - prev_close).abs(),
+        (df["low"] - prev_close).abs(),
+    ], axis=1).max(axis=1)
+    atr = tr.rolling(window=period).mean().iloc[-1]
+    return float(atr) if pd.notna(atr) else None
+
+
+def _ref_signals(code: str, direction: str, df: pd.DataFrame) -> list[dict]:
+    period = config.ATR_PERIOD
+    dev_mult = config.AVWAP_DEVIATION_MULTIPLIER
+    signals = []
+    for t in TICKS:
+        d = df[df["datetime"] <= t]
+        if len(d) < 2:
+            continue
+        avwap = _ref_avwap(d, ANCHOR)
+        atr = _ref_atr(d, period)
+        if avwap is None or atr is None:
+            continue
+        cur, prev = d.iloc[-1], d.iloc[-2]
+        cp = float(cur["close"])
+        if abs(cp - avwap) < dev_mult * atr:
+            continue
+        if direction == "short":
+            hit = cp > avwap and prev["close"] > prev["open"] and cp < prev["open"]
+            stop = cur["high"] + config.STOP_LOSS_ATR_MULTIPLIER * atr
+        else:
+            hit = cp < avwap and prev["close"] < prev["open"] and cp > prev["open"]
+            stop = cur["low"] - config.STOP_LOSS_ATR_MULTIPLIER * atr
+        if hit:
+            signals.append({
+                "code": code,
+                "timestamp": t.isoformat(),
+                "signal_type": "逆張りショート" if direction == "short" else "逆張りロング",
+                "direction": direction,
+                "current_price": cp,
+                "avwap": avwap,
+                "atr": atr,
+                "entry_trigger_price": float(prev["open"]),
+                "target_price": avwap,
+                "stop_loss_price": float(stop),
+                "price_deviation": abs(cp - avwap),
+                "setup_threshold": dev_mult * atr,
+            })
+    return signals
+
+
+def _minute_bars(seed: int) -> pd.DataFrame:
+    """08:50–09:20 random-walk bars with a blank volume, a blank bar, a blank close and a gap."""
+    rng = np.random.default_rng(seed)
+    dt = pd.date_range(DAY.replace(hour=8, minute=50), DAY.replace(hour=9, minute=20), freq="1min")
+    close = 1000 + np.cumsum(rng.normal(0, 3, len(dt)))
+    open_ = close + rng.normal(0, 3, len(dt))
+    df = pd.DataFrame({
+        "datetime": dt,
+        "open": open_,
+        "high": np.maximum(open_, close) + rng.uniform(0, 2, len(dt)),
+        "low": np.minimum(open_, close) - rng.uniform(0, 2, len(dt)),
+        "close": close,
+        "volume": rng.integers(100, 5000, len(dt)).astype(float),
+    })
+    df.loc[df["datetime"] == ANCHOR.replace(minute=1), "volume"] = np.nan
+    df.loc[df["datetime"] == ANCHOR.replace(minute=4), ["open", "high", "low", "close", "volume"]] = np.nan
+    df.loc[df["datetime"] == ANCHOR.replace(minute=9), "close"] = np.nan
+    return df[df["datetime"] != ANCHOR.replace(minute=12)].reset_index(drop=True)
+
+
+@pytest.mark.parametrize("dev_mult", [0.0, 0.6], ids=["no-gate", "default-gate"])
+@pytest.mark.parametrize("direction", ["short", "long"])
+def test_simulate_code_matches_pandas_reference_with_nan_bars(monkeypatch, direction, dev_mult):
+    # 0.0 disables the |close - AVWAP| >= k * ATR gate so the entry rule fires often;
+    # 0.6 (config_example default) checks the gate itself
+    monkeypatch.setattr(config, "AVWAP_DEVIATION_MULTIPLIER", dev_mult)
+    after_blank = 0
+    for seed in range(100):
+        df = _minute_bars(seed)
+        expected = _ref_signals("1000", direction, df)
+        got = [asdict(s) for s in simulate_code(
+            "1000", direction, PriceSoA.from_frame(df), ANCHOR, TICKS.to_numpy("datetime64[ns]"),
+        )]
+        assert [s["timestamp"] for s in got] == [s["timestamp"] for s in expected], seed
+        for g, e in zip(got, expected):
+            assert g.keys() == e.keys()
+            for k, v in e.items():
+                if isinstance(v, float):
+                    assert math.isclose(g[k], v, rel_tol=1e-9), (seed, k)
+                else:
+                    assert g[k] == v, (seed, k)
+        # 09:04 is blank, so ATR is undefined through 09:08 and must recover afterwards
+        after_blank += sum(s["timestamp"] >= ANCHOR.replace(minute=9).isoformat() for s in got)
+    assert after_blank > 0
+
+
+def _normalized(df: pd.DataFrame) -> pd.DataFrame:
+    # Parquet round trips may change the datetime unit; PriceSoA uses ns either way
+    return df.assign(datetime=df["datetime"].astype("datetime64[ns]")).reset_index(drop=True)
+
+
+def test_minute_cache_recovers_from_truncated_parquet(tmp_path):
+    pytest.importorskip("pyarrow")
+    _minute_bars(0).to_csv(tmp_path / "1000.csv", index=False)
+    first = _normalized(load_minute_csv(tmp_path, "1000", "2025-09-02"))
+    cache = tmp_path / "1000.parquet"
+    cache.write_bytes(cache.read_bytes()[:20])  # an interrupted write
+
+    pd.testing.assert_frame_equal(_normalized(load_minute_csv(tmp_path, "1000", "2025-09-02")), first)
+    # The cache was rewritten whole and no temp file was left behind
+    pd.testing.assert_frame_equal(_normalized(load_minute_csv(tmp_path, "1000", "2025-09-02")), first)
+    assert sorted(f.name for f in tmp_path.iterdir()) == ["1000.csv", "1000.parquet"]
+
+
+def test_aoi_cache_recovers_from_truncated_parquet(tmp_path):
+    pytest.importorskip("pyarrow")
+    ts = pd.date_range(DAY.replace(hour=8, minute=55), DAY.replace(hour=8, minute=59, second=50), freq="10s")
+    aoi = pd.DataFrame({
+        "code": np.repeat(["1301", "7203"], len(ts)),
+        "timestamp": np.tile(ts.strftime("%Y-%m-%d %H:%M:%S"), 2),
+        "aoi": np.r_[np.full(len(ts), 0.5), np.full(len(ts), -0.45)],
+    })
+    aoi.to_csv(tmp_path / "aoi.csv", index=False)
+    first = build_monitoring_list(tmp_path / "aoi.csv", "2025-09-02")
+    assert [m["code"] for m in first] == ["1301", "7203"]
+    cache = tmp_path / "aoi.parquet"
+    cache.write_bytes(cache.read_bytes()[:20])
+
+    assert build_monitoring_list(tmp_path / "aoi.csv", "2025-09-02") == first
+    assert build_monitoring_list(tmp_path / "aoi.csv", "2025-09-02") == first
+    assert sorted(f.name for f in tmp_path.iterdir()) == ["aoi.csv", "aoi.parquet"]
+
+
+@pytest.mark.parametrize("output_name", ["out.json", "out.jsonl"])
+def test_jsonl_sidecar_is_separate_from_summary(tmp_path, monkeypatch, output_name):
+    monkeypatch.setattr(config, "AVWAP_DEVIATION_MULTIPLIER", 0.0)
+    minute_dir = tmp_path / "minute"
+    minute_dir.mkdir()
+    ts = pd.date_range(DAY.replace(hour=8, minute=55), DAY.replace(hour=8, minute=59, second=50), freq="10s")
+    codes = [str(1000 + seed) for seed in range(10)]
+    pd.DataFrame({
+        "code": np.repeat(codes, len(ts)),
+        "timestamp": np.tile(ts.strftime("%Y-%m-%d %H:%M:%S"), len(codes)),
+        "aoi": 0.5,
+    }).to_csv(tmp_path / "aoi.csv", index=False)
+    for seed, code in enumerate(codes):
+        _minute_bars(seed).to_csv(minute_dir / f"{code}.csv", index=False)
+
+    output = tmp_path / output_name
+    summary = run_offline_backtest(tmp_path / "aoi.csv", minute_dir, "2025-09-02", output, jsonl=True)
+    signals_path = tmp_path / summary["signals_file"]
+    assert signals_path != output
+    assert json.loads(output.read_text(encoding="utf-8")) == summary
+    rows = [json.loads(line) for line in signals_path.read_text(encoding="utf-8").splitlines()]
+    assert len(rows) == summary["signals_count"] > 0
+
+
+def test_json_output_does_not_depend_on_orjson(tmp_path, monkeypatch):
+    import backtest.offline_backtest as ob
+
+    pytest.importorskip("orjson")
+    obj = {"date": "2025-09-02", "signals": [{"code": "1000", "avwap": 1001.5, "stop_loss_price": float("nan")}]}
+    ob._write_json(tmp_path / "a.json", obj)
+    ob._write_jsonl(tmp_path / "a.jsonl", obj["signals"])
+    monkeypatch.setattr(ob, "orjson", None)
+    ob._write_json(tmp_path / "b.json", obj)
+    ob._write_jsonl(tmp_path / "b.jsonl", obj["signals"])
+
+    assert (tmp_path / "a.json").read_bytes() == (tmp_path / "b.json").read_bytes()
+    assert (tmp_path / "a.jsonl").read_bytes() == (tmp_path / "b.jsonl").read_bytes()
+    assert json.loads((tmp_path / "a.json").read_text(encoding="utf-8"))["signals"][0]["stop_loss_price"] is None